@@ -1,47 +1,59 @@
 from PIL import Image
-import matplotlib.pyplot as plt
 import numpy as np
 from os import listdir
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import warnings
 import os
 
-ARR = np.empty([1,4])
+def load_coords(f):
+	txt_name = 'co/'+os.path.splitext(f)[0]+'.txt'
 
-i = 0
-k = 0
+	# one row per box: x y w h; a file with no boxes is fine, so keep loadtxt quiet about it
+	with warnings.catch_warnings():
+		warnings.filterwarnings('ignore', 'loadtxt: input contained no data')
+		return np.loadtxt(txt_name, comments='#', dtype=np.int32).reshape(-1, 4)
 
-for f in listdir('data/'):
-	img = Image.open('data/'+f)
-	d = np.asarray(img)
-	print('Shape : ',d.shape)
+def process_one(f, coords, k):
+	if len(coords) == 0:
+		return
 
-	txt_name = 'co/'+os.path.splitext(f)[0]+'.txt'
+	ratios = coords[:,3] / coords[:,2]
+	new_w = np.where(ratios > 1, 32, (32 / ratios).astype(int))
+	new_h = np.where(ratios > 1, (32 * ratios).astype(int), 32)
 
-	fo = open(txt_name, "r")
-	for line in fo:
-		if not line.startswith('#'):
-			for word in line.split():
-				ARR[0][i] = int(word)
-				print(int(word))
-				i = i +1
-
-		img2 = img.crop((int(ARR[0][0]), int(ARR[0][1]), int(ARR[0][0] + ARR[0][2]), int(ARR[0][1] + ARR[0][3])))
-		name = "resized/new-img" + str(k) + ".png"
-		A = np.asarray(img2)
-
-		if(A.shape[1] < A.shape[0]):
-			print('Image no : ',k)
-			c = A.shape[0] / A.shape[1]
-			w2 = 32 * c
-			print('C : W2 : H2 || ',c,w2,32)
-			resize = img2.resize((32,int(w2)),Image.ANTIALIAS)
-			resize.save(name)
-		else:
-			print('Image no : ',k)
-			c = A.shape[0] / A.shape[1]
-			h2 = 32 / c
-			print('C : W2 : H2 || ',c,32,h2)
-			resize = img2.resize((int(h2),32),Image.ANTIALIAS)
+	with Image.open('data/'+f) as img:
+		sx = sy = 1
+		if img.format == 'JPEG':
+			# let libjpeg decode at 1/2, 1/4 or 1/8 scale while the smallest box keeps 64px on its short side
+			full_w, full_h = img.size
+			s = min(1, 64 / coords[:,2:].min())
+			img.draft(img.mode, (int(full_w * s), int(full_h * s)))
+			sx = img.size[0] / full_w
+			sy = img.size[1] / full_h
+
+		for (x, y, w, h), w2, h2 in zip(coords, new_w, new_h):
+			img2 = img.crop((int(x * sx), int(y * sy), int((x + w) * sx), int((y + h) * sy)))
+			name = "resized/new-img" + str(k) + ".png"
+			resize = img2.resize((int(w2),int(h2)),Image.Resampling.LANCZOS)
 			resize.save(name)
-	#img2.save(name)
-		k = k + 1
-		i = 0
\ No newline at end of file
+			k = k + 1
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--verbose', action='store_true', help='print each image and its number of boxes')
+	args = parser.parse_args()
+
+	files = tuple(sorted(listdir('data/')))
+	coords = [load_coords(f) for f in files]
+
+	# output images are numbered across all files, so each file starts where the previous one ended
+	starts = np.concatenate(([0], np.cumsum([len(c) for c in coords])[:-1]))
+
+	chunksize = max(1, len(files) // ((os.cpu_count() or 1) * 4))
+	with ProcessPoolExecutor() as ex:
+		list(ex.map(process_one, files, coords, starts.tolist(), chunksize=chunksize))
+
+	if args.verbose:
+		for f, c, k in zip(files, coords, starts):
+			print('Image : ',f,' Boxes : ',len(c),' From : ',k)